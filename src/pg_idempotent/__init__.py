@@ -1,7 +1,15 @@
 """PostgreSQL Idempotent Migration Tool."""
 __version__ = "0.1.0"
 
-from .transformer.transformer import SQLTransformer
-from .cli import app, main
-
 __all__ = ["SQLTransformer", "app", "main"]
+
+
+def __getattr__(name):
+    """Import public names on first access to keep CLI startup light."""
+    if name == "SQLTransformer":
+        from .transformer.transformer import SQLTransformer
+        return SQLTransformer
+    if name in ("app", "main"):
+        from . import cli
+        return getattr(cli, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
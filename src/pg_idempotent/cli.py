@@ -1,19 +1,52 @@
-"""PG Idempotent CLI."""
+"""PG Idempotent CLI.
 
+Heavy imports (the transformer and its pglast parser, rich tables/syntax, the
+process pool) happen inside the commands that need them, so ``--help`` and
+shell completion start quickly.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
 import typer
+from collections import deque
+from functools import partial
+from itertools import islice
+from operator import attrgetter
 from pathlib import Path
-from typing import Optional, List
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional, List, Tuple
 from rich import print as rprint
 from rich.console import Console
-from rich.table import Table
-from rich.panel import Panel
-from rich.syntax import Syntax
+from rich.markup import escape
+
+from .utils.file_utils import FileOperations
 
-from .transformer.transformer import SQLTransformer
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+    from .transformer.transformer import SQLTransformer, TransformationResult
 
 app = typer.Typer(help="PostgreSQL Idempotent Migration Tool")
 console = Console()
 
+# Serial batch pipeline: threads reading ahead / writing behind the transform loop
+READ_THREADS = 4
+WRITE_THREADS = 2
+PREFETCH_DEPTH = 32
+
+# Number of statements listed in the check command's detail table
+CHECK_DETAIL_ROWS = 10
+
+# Rows of the statistics table as (label, stats key)
+STATS_ROWS = (
+    ("Total Statements", 'total_statements'),
+    ("Already Idempotent", 'already_idempotent'),
+    ("Can Transform", 'transformable'),
+    ("Cannot Transform", 'not_transformable'),
+    ("Errors", 'errors'),
+)
+
 
 @app.command()
 def transform(
@@ -29,34 +62,46 @@ def transform(
         rprint(f"[red]Error:[/red] File not found: {input_file}")
         raise typer.Exit(1)
     
+    from .transformer.transformer import SQLTransformer
+    
     # Create transformer
     transformer = SQLTransformer()
     
+    # Parse once; stats and transformation share the same statements
+    try:
+        sql_content = FileOperations.read_sql(input_file)
+    except Exception as e:
+        failure = _file_error_result(str(input_file), e)
+        _print_bullets("[red]Error:[/red] Transformation failed", failure.errors)
+        raise typer.Exit(1)
+    
+    try:
+        statements = transformer.parser.parse_sql(sql_content)
+    except Exception as e:
+        # Same message transform_sql reports for a parse failure
+        _print_bullets("[red]Error:[/red] Transformation failed", [f"Transformation failed: {str(e)}"])
+        raise typer.Exit(1)
+    
     # Show stats if requested
     if stats:
-        with open(input_file, 'r', encoding='utf-8') as f:
-            sql_content = f.read()
-        
-        transformation_stats = transformer.get_transformation_stats(sql_content)
+        transformation_stats = transformer.stats_from(statements)
         _display_stats(transformation_stats)
     
     # Create backup if requested
     if backup and not output_file:
         backup_file = input_file.with_suffix(f"{input_file.suffix}.backup")
-        backup_file.write_text(input_file.read_text())
+        shutil.copyfile(input_file, backup_file)
         rprint(f"[green]✓[/green] Backup created: {backup_file}")
     
     # Determine output file
     if not output_file:
         output_file = input_file
     
-    # Transform file
-    result = transformer.transform_file(str(input_file), str(output_file))
+    # Transform the already-read SQL, reusing its parse
+    result = transformer.transform_string(sql_content, output_file, statements)
     
     if not result.success:
-        rprint(f"[red]Error:[/red] Transformation failed")
-        for error in result.errors:
-            rprint(f"  • {error}")
+        _print_bullets("[red]Error:[/red] Transformation failed", result.errors)
         raise typer.Exit(1)
     
     # Display results
@@ -65,22 +110,16 @@ def transform(
     rprint(f"  • Transformed {result.transformed_count} statements")
     
     if result.warnings:
-        rprint(f"[yellow]Warnings:[/yellow]")
-        for warning in result.warnings:
-            rprint(f"  • {warning}")
+        _print_bullets("[yellow]Warnings:[/yellow]", result.warnings)
     
     if result.errors:
-        rprint(f"[red]Errors:[/red]")
-        for error in result.errors:
-            rprint(f"  • {error}")
+        _print_bullets("[red]Errors:[/red]", result.errors)
     
     # Validate if requested
     if validate:
         validation = transformer.validate_transformed_sql(result.transformed_sql)
         if not validation['valid']:
-            rprint(f"[yellow]Validation issues found:[/yellow]")
-            for issue in validation['issues']:
-                rprint(f"  • {issue}")
+            _print_bullets("[yellow]Validation issues found:[/yellow]", validation['issues'])
         else:
             rprint(f"[green]✓[/green] Validation passed")
     
@@ -97,18 +136,26 @@ def check(
         rprint(f"[red]Error:[/red] File not found: {input_file}")
         raise typer.Exit(1)
     
+    from rich.table import Table
+    
+    from .transformer.transformer import SQLTransformer
+    
     # Create transformer and analyze
     transformer = SQLTransformer()
     
-    with open(input_file, 'r', encoding='utf-8') as f:
-        sql_content = f.read()
-    
-    stats = transformer.get_transformation_stats(sql_content)
-    _display_stats(stats)
+    try:
+        sql_content = FileOperations.read_sql(input_file)
+    except Exception as e:
+        failure = _file_error_result(str(input_file), e)
+        _print_bullets("[red]Error:[/red] Analysis failed", failure.errors)
+        raise typer.Exit(1)
     
-    # Parse to get detailed info
+    # Parse once for both the summary and the detailed info
     statements = transformer.parser.parse_sql(sql_content)
     
+    stats = transformer.stats_from(statements)
+    _display_stats(stats)
+    
     if statements:
         rprint(f"\n[bold]Statement Details:[/bold]")
         
@@ -118,30 +165,30 @@ def check(
         table.add_column("Status", style="yellow")
         table.add_column("Notes")
         
-        for stmt in statements[:10]:  # Show first 10
-            status = "✓ Idempotent" if stmt.is_idempotent else "⚠ Needs Transform"
-            if stmt.error:
-                status = "✗ Error"
-            elif not stmt.can_be_wrapped:
-                status = "⚠ Cannot Wrap"
+        statement_fields = attrgetter(
+            'statement_type', 'object_name', 'is_idempotent', 'can_be_wrapped', 'error'
+        )
+        
+        # Only the rows that are shown get built and styled
+        for stmt in islice(statements, CHECK_DETAIL_ROWS):
+            stmt_type, object_name, is_idempotent, can_be_wrapped, error = statement_fields(stmt)
             
-            notes = ""
-            if stmt.error:
-                notes = stmt.error
-            elif not stmt.can_be_wrapped:
-                notes = "Cannot be wrapped in DO block"
+            if error:
+                status, notes = "✗ Error", error
+            elif not can_be_wrapped:
+                status, notes = "⚠ Cannot Wrap", "Cannot be wrapped in DO block"
+            elif is_idempotent:
+                status, notes = "✓ Idempotent", ""
+            else:
+                status, notes = "⚠ Needs Transform", ""
             
-            table.add_row(
-                stmt.statement_type,
-                stmt.object_name or "N/A",
-                status,
-                notes
-            )
+            table.add_row(stmt_type, object_name or "N/A", status, notes)
         
         console.print(table)
         
-        if len(statements) > 10:
-            rprint(f"... and {len(statements) - 10} more statements")
+        remaining = len(statements) - CHECK_DETAIL_ROWS
+        if remaining > 0:
+            rprint(f"... and {remaining} more statements")
 
 
 @app.command()
@@ -155,18 +202,28 @@ def preview(
         rprint(f"[red]Error:[/red] File not found: {input_file}")
         raise typer.Exit(1)
     
+    from rich.panel import Panel
+    from rich.syntax import Syntax
+    
+    from .transformer.transformer import SQLTransformer
+    
     # Transform and show preview
     transformer = SQLTransformer()
-    result = transformer.transform_file(str(input_file))
+    try:
+        sql_content = FileOperations.read_sql(input_file)
+    except Exception as e:
+        result = _file_error_result(str(input_file), e)
+    else:
+        result = transformer.transform_sql(sql_content)
     
     if not result.success:
-        rprint(f"[red]Error:[/red] Transformation failed")
-        for error in result.errors:
-            rprint(f"  • {error}")
+        _print_bullets("[red]Error:[/red] Transformation failed", result.errors)
         raise typer.Exit(1)
     
     # Show preview
-    preview_lines = result.transformed_sql.split('\n')[:lines]
+    # Only split off the lines being shown; count the rest without a list
+    preview_lines = result.transformed_sql.split('\n', lines)[:lines]
+    total_lines = result.transformed_sql.count('\n') + 1
     preview_content = '\n'.join(preview_lines)
     
     syntax = Syntax(preview_content, "sql", theme="monokai", line_numbers=True)
@@ -179,8 +236,7 @@ def preview(
     
     console.print(panel)
     
-    if len(result.transformed_sql.split('\n')) > lines:
-        total_lines = len(result.transformed_sql.split('\n'))
+    if total_lines > lines:
         rprint(f"\n[dim]... and {total_lines - lines} more lines[/dim]")
 
 
@@ -190,6 +246,8 @@ def batch(
     pattern: str = typer.Option("*.sql", "--pattern", "-p", help="File pattern to match"),
     output_dir: Optional[Path] = typer.Option(None, "--output-dir", "-o", help="Output directory"),
     recursive: bool = typer.Option(False, "--recursive", "-r", help="Search recursively"),
+    jobs: int = typer.Option(0, "--jobs", "-j", min=0, help="Number of worker processes (0 = all cores)"),
+    sync: bool = typer.Option(False, "--sync/--no-sync", help="fsync outputs before finishing"),
 ) -> None:
     """Transform multiple SQL files in a directory."""
     
@@ -197,11 +255,12 @@ def batch(
         rprint(f"[red]Error:[/red] Directory not found: {directory}")
         raise typer.Exit(1)
     
+    if not directory.is_dir():
+        rprint(f"[red]Error:[/red] Not a directory: {directory}")
+        raise typer.Exit(1)
+    
     # Find SQL files
-    if recursive:
-        files = list(directory.rglob(pattern))
-    else:
-        files = list(directory.glob(pattern))
+    files = list(FileOperations.iter_sql_files(directory, pattern, recursive))
     
     if not files:
         rprint(f"[yellow]No files found matching pattern: {pattern}")
@@ -209,57 +268,198 @@ def batch(
     
     rprint(f"Found {len(files)} files to process")
     
-    # Create transformer
-    transformer = SQLTransformer()
-    
-    success_count = 0
-    error_count = 0
+    # Calculate output paths, creating each output subdirectory only once
+    created_dirs = set()
+    if output_dir:
+        output_dir.mkdir(parents=True, exist_ok=True)
+        created_dirs.add(output_dir)
     
+    tasks = []
     for file_path in files:
-        rprint(f"\n[cyan]Processing:[/cyan] {file_path.name}")
-        
-        # Calculate output path
         if output_dir:
-            output_dir.mkdir(parents=True, exist_ok=True)
             if recursive:
                 # Preserve directory structure
                 rel_path = file_path.relative_to(directory)
                 out_path = output_dir / rel_path
-                out_path.parent.mkdir(parents=True, exist_ok=True)
+                if out_path.parent not in created_dirs:
+                    out_path.parent.mkdir(parents=True, exist_ok=True)
+                    created_dirs.add(out_path.parent)
             else:
                 out_path = output_dir / file_path.name
         else:
             out_path = file_path
+        tasks.append((str(file_path), str(out_path)))
+    
+    workers = min(jobs or os.cpu_count() or 1, len(tasks))
+    
+    if workers <= 1:
+        from .transformer.transformer import SQLTransformer
+        
+        # Transform serially with a single shared transformer, overlapping file I/O
+        transformer = SQLTransformer()
+        results = _transform_pipelined(transformer, tasks, sync)
+        success_count, error_count, written = _report_batch_results(results)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
         
-        # Transform file
-        result = transformer.transform_file(str(file_path), str(out_path))
+        # Files are independent, so fan them out across worker processes
+        chunksize = max(1, len(tasks) // (4 * workers))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(partial(_process_one, sync=sync), tasks, chunksize=chunksize)
+            success_count, error_count, written = _report_batch_results(results)
+    
+    if sync:
+        # One fsync per directory a rename landed in makes all the renames durable
+        FileOperations.sync_directories(written)
+    
+    rprint(f"\n[bold]Summary:[/bold]")
+    rprint(f"  • {success_count} files processed successfully")
+    rprint(f"  • {error_count} files failed")
+
+
+def _process_one(
+    args: Tuple[str, str], sync: bool = False
+) -> Tuple[str, TransformationResult, Optional[Path]]:
+    """Transform a single file inside a batch worker process."""
+    from .transformer.transformer import SQLTransformer
+    
+    input_path, output_path = args
+    written = None
+    
+    try:
+        # Each worker builds its own transformer rather than pickling a shared one
+        result = SQLTransformer().transform_sql(FileOperations.read_sql(input_path))
+        if result.success:
+            written = FileOperations.write_atomic(output_path, result.transformed_sql, sync=sync)
+    except Exception as e:
+        result = _file_error_result(input_path, e)
+    
+    return input_path, result, written
+
+
+def _transform_pipelined(
+    transformer: SQLTransformer, tasks: List[Tuple[str, str]], sync: bool = False
+) -> Iterator[Tuple[str, TransformationResult, Optional[Path]]]:
+    """Transform files in order while threads prefetch inputs and flush outputs.
+    
+    Results are yielded in input order once their output has been written.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    
+    pending_tasks = iter(tasks)
+    
+    with ThreadPoolExecutor(max_workers=READ_THREADS) as readers, \
+            ThreadPoolExecutor(max_workers=WRITE_THREADS) as writers:
+        reads = deque(
+            (input_path, output_path, readers.submit(FileOperations.read_sql, input_path))
+            for input_path, output_path in islice(pending_tasks, PREFETCH_DEPTH)
+        )
+        writes: deque = deque()
+        
+        while reads:
+            input_path, output_path, read = reads.popleft()
+            
+            # Keep the read-ahead window full
+            for next_input, next_output in islice(pending_tasks, 1):
+                reads.append((next_input, next_output, readers.submit(FileOperations.read_sql, next_input)))
+            
+            try:
+                result = transformer.transform_sql(read.result())
+            except Exception as e:
+                result = _file_error_result(input_path, e)
+            
+            write = None
+            if result.success:
+                write = writers.submit(
+                    FileOperations.write_atomic, output_path, result.transformed_sql, sync
+                )
+            writes.append((input_path, result, write))
+            
+            # Report everything at the head of the queue whose write has landed
+            while writes and (writes[0][2] is None or writes[0][2].done()):
+                yield _settle_write(*writes.popleft())
+            
+            # Bound the write-behind window so finished output can't pile up in memory
+            if len(writes) >= PREFETCH_DEPTH:
+                yield _settle_write(*writes.popleft())
+        
+        while writes:
+            yield _settle_write(*writes.popleft())
+
+
+def _settle_write(
+    input_path: str, result: TransformationResult, write: Optional[Future]
+) -> Tuple[str, TransformationResult, Optional[Path]]:
+    """Wait for a pending output write and fold any write error into the result."""
+    written = None
+    if write is not None:
+        try:
+            written = write.result()
+        except Exception as e:
+            result = _file_error_result(input_path, e)
+    return input_path, result, written
+
+
+def _file_error_result(input_path: str, error: Exception) -> TransformationResult:
+    """Build a failed result for a file that could not be read or written."""
+    from .transformer.transformer import TransformationResult
+    
+    if isinstance(error, FileNotFoundError):
+        message = f"File not found: {input_path}"
+    else:
+        message = f"File processing failed: {str(error)}"
+    
+    return TransformationResult(
+        success=False,
+        transformed_sql="",
+        statement_count=0,
+        transformed_count=0,
+        errors=[message],
+        warnings=[]
+    )
+
+
+def _report_batch_results(results) -> Tuple[int, int, List[Path]]:
+    """Print per-file batch results as they arrive.
+    
+    Returns (successes, failures, paths actually written).
+    """
+    success_count = 0
+    error_count = 0
+    written_paths = []
+    
+    for input_path, result, written in results:
+        rprint(f"\n[cyan]Processing:[/cyan] {Path(input_path).name}")
         
         if result.success:
             success_count += 1
+            written_paths.append(written)
             rprint(f"  [green]✓[/green] {result.transformed_count}/{result.statement_count} statements transformed")
         else:
             error_count += 1
-            rprint(f"  [red]✗[/red] Failed")
-            for error in result.errors[:2]:  # Show first 2 errors
-                rprint(f"    • {error}")
+            # Show first 2 errors
+            _print_bullets("  [red]✗[/red] Failed", result.errors[:2], indent="    ")
     
-    rprint(f"\n[bold]Summary:[/bold]")
-    rprint(f"  • {success_count} files processed successfully")
-    rprint(f"  • {error_count} files failed")
+    return success_count, error_count, written_paths
+
+
+def _print_bullets(title: str, items: Iterable[str], indent: str = "  ") -> None:
+    """Print a title followed by a bulleted list in a single console write."""
+    lines = [title]
+    lines.extend(f"{indent}• {escape(str(item))}" for item in items)
+    console.print("\n".join(lines))
 
 
 def _display_stats(stats: dict) -> None:
     """Display transformation statistics."""
+    from rich.table import Table
     
     table = Table(title="Transformation Statistics")
     table.add_column("Metric", style="cyan")
     table.add_column("Count", style="green")
     
-    table.add_row("Total Statements", str(stats['total_statements']))
-    table.add_row("Already Idempotent", str(stats['already_idempotent']))
-    table.add_row("Can Transform", str(stats['transformable']))
-    table.add_row("Cannot Transform", str(stats['not_transformable']))
-    table.add_row("Errors", str(stats['errors']))
+    for label, key in STATS_ROWS:
+        table.add_row(label, f"{stats[key]}")
     
     console.print(table)
     
@@ -269,8 +469,9 @@ def _display_stats(stats: dict) -> None:
         type_table.add_column("Type", style="cyan")
         type_table.add_column("Count", style="green")
         
-        for stmt_type, count in sorted(stats['by_type'].items()):
-            type_table.add_row(stmt_type, str(count))
+        # by_type arrives already sorted by statement type
+        for stmt_type, count in stats['by_type'].items():
+            type_table.add_row(stmt_type, f"{count}")
         
         console.print(type_table)
 
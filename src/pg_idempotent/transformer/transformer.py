@@ -1,9 +1,11 @@
 """
 Main transformer module that ties everything together.
 """
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Union
 from dataclasses import dataclass
+from pathlib import Path
 from ..parser.parser import PostgreSQLParser, ParsedStatement
+from ..utils.file_utils import FileOperations
 from .templates import StatementTransformer
 
 
@@ -47,7 +49,21 @@ class SQLTransformer:
         try:
             # Parse SQL
             statements = self.parser.parse_sql(sql)
-            
+        except Exception as e:
+            return TransformationResult(
+                success=False,
+                transformed_sql=sql,
+                statement_count=0,
+                transformed_count=0,
+                errors=[f"Transformation failed: {str(e)}"],
+                warnings=[]
+            )
+        
+        return self.transform_parsed(statements, sql)
+    
+    def transform_parsed(self, statements: List[ParsedStatement], sql: str = "") -> TransformationResult:
+        """Transform already-parsed statements to idempotent version."""
+        try:
             # Transform statements
             transformed_statements = self.statement_transformer.transform_statements(statements)
             
@@ -89,17 +105,6 @@ class SQLTransformer:
             # Read input file
             with open(input_file, 'r', encoding='utf-8') as f:
                 sql = f.read()
-            
-            # Transform SQL
-            result = self.transform_sql(sql)
-            
-            # Write to output file if specified
-            if output_file and result.success:
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    f.write(result.transformed_sql)
-            
-            return result
-            
         except FileNotFoundError:
             return TransformationResult(
                 success=False,
@@ -118,6 +123,40 @@ class SQLTransformer:
                 errors=[f"File processing failed: {str(e)}"],
                 warnings=[]
             )
+        
+        return self.transform_string(sql, output_file)
+    
+    def transform_string(
+        self,
+        sql: str,
+        output_file: Optional[Union[str, Path]] = None,
+        statements: Optional[List[ParsedStatement]] = None,
+    ) -> TransformationResult:
+        """Transform in-memory SQL, optionally writing the result to a file.
+        
+        Pass ``statements`` to reuse an existing parse of ``sql``.
+        """
+        # Transform SQL
+        if statements is None:
+            result = self.transform_sql(sql)
+        else:
+            result = self.transform_parsed(statements, sql)
+        
+        # Write to output file if specified
+        if output_file and result.success:
+            try:
+                FileOperations.write_bytes_fast(output_file, result.transformed_sql.encode('utf-8'))
+            except Exception as e:
+                return TransformationResult(
+                    success=False,
+                    transformed_sql="",
+                    statement_count=0,
+                    transformed_count=0,
+                    errors=[f"File processing failed: {str(e)}"],
+                    warnings=[]
+                )
+        
+        return result
     
     def validate_transformed_sql(self, transformed_sql: str) -> Dict[str, Any]:
         """Validate transformed SQL for common issues."""
@@ -156,8 +195,10 @@ class SQLTransformer:
     
     def get_transformation_stats(self, sql: str) -> Dict[str, int]:
         """Get statistics about what would be transformed."""
-        statements = self.parser.parse_sql(sql)
-        
+        return self.stats_from(self.parser.parse_sql(sql))
+    
+    def stats_from(self, statements: List[ParsedStatement]) -> Dict[str, int]:
+        """Get transformation statistics for already-parsed statements."""
         stats = {
             'total_statements': len(statements),
             'already_idempotent': sum(1 for stmt in statements if stmt.is_idempotent),
@@ -171,6 +212,7 @@ class SQLTransformer:
         for stmt in statements:
             type_counts[stmt.statement_type] = type_counts.get(stmt.statement_type, 0) + 1
         
-        stats['by_type'] = type_counts
+        # Sorted by type name so callers can display it without re-sorting
+        stats['by_type'] = dict(sorted(type_counts.items()))
         
         return stats
\ No newline at end of file
@@ -1,17 +1,61 @@
 """File system utilities for the transformer."""
+import fnmatch
+import functools
+import mmap
 import os
+import re
 import shutil
+import stat
+import time
 from pathlib import Path
-from datetime import datetime
-from typing import Optional, Union, List
+from typing import Callable, Iterable, Iterator, Optional, Union, List
+
+# Read buffer size for SQL files, and the size above which they are mmapped
+READ_BUFFER_SIZE = 1 << 20
+MMAP_THRESHOLD = 16 << 20
+
+# Supabase migrations live under supabase/migrations or are named <timestamp>_name.sql
+_SUPABASE_MIGRATION_DIRS = frozenset(("supabase", "migrations"))
+_SUPABASE_MIGRATION_RE = re.compile(r'\d{14}_.*\.sql')
+
+# Characters that make a glob pattern more than a literal string
+_GLOB_CHARS = re.compile(r'[*?[]')
+
+
+def _name_matcher(pattern: str) -> Callable[[str], bool]:
+    """Build a filename predicate for a glob pattern.
+    
+    Plain ``*<suffix>`` patterns such as ``*.sql`` become a ``str.endswith``
+    check; anything else falls back to the translated fnmatch regex.
+    """
+    suffix = pattern[1:]
+    if pattern.startswith('*') and not _GLOB_CHARS.search(suffix):
+        return lambda name: name.endswith(suffix)
+    
+    regex = re.compile(fnmatch.translate(pattern))
+    return lambda name: regex.match(name) is not None
+
+
+@functools.lru_cache(maxsize=1024)
+def _resolved(path: Path) -> Path:
+    """Resolve an absolute path, caching the result for repeatedly used base directories."""
+    return path.resolve()
 
 
 class FileOperations:
     """Handles file system operations with backup support."""
     
     @staticmethod
-    def backup_file(file_path: Union[str, Path], backup_dir: Optional[Union[str, Path]] = None) -> Path:
-        """Create a backup of a file."""
+    def backup_file(
+        file_path: Union[str, Path],
+        backup_dir: Optional[Union[str, Path]] = None,
+        fast: bool = False,
+    ) -> Path:
+        """Create a backup of a file.
+        
+        With ``fast=True`` only the contents are copied, skipping the extra
+        metadata syscalls that ``shutil.copy2`` makes.
+        """
         file_path = Path(file_path)
         
         if not file_path.exists():
@@ -26,15 +70,110 @@ class FileOperations:
         # Create backup directory
         backup_path.mkdir(parents=True, exist_ok=True)
         
-        # Generate backup filename with timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # Generate backup filename with a nanosecond timestamp, unique even for
+        # several backups of the same file within one second
+        timestamp = time.time_ns()
         backup_file = backup_path / f"{file_path.stem}_{timestamp}{file_path.suffix}"
         
         # Copy file
-        shutil.copy2(file_path, backup_file)
+        if fast:
+            shutil.copyfile(file_path, backup_file)
+        else:
+            shutil.copy2(file_path, backup_file)
         
         return backup_file
     
+    @staticmethod
+    def read_sql(file_path: Union[str, Path]) -> str:
+        """Read a SQL file as UTF-8 text with a large buffer, mmapping big files."""
+        file_path = Path(file_path)
+        
+        with file_path.open('rb', buffering=READ_BUFFER_SIZE) as f:
+            if os.fstat(f.fileno()).st_size > MMAP_THRESHOLD:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    # Decode straight from the mapping, without a bytes copy
+                    text = str(mm, 'utf-8')
+            else:
+                text = f.read().decode('utf-8')
+        
+        # Match text-mode universal newline handling
+        if '\r' in text:
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+        
+        return text
+    
+    @staticmethod
+    def write_bytes_fast(
+        file_path: Union[str, Path], data: bytes, sync: bool = False, mode: int = 0o666
+    ) -> None:
+        """Write bytes straight to a file descriptor, bypassing Python's I/O layers.
+        
+        Short writes are retried until everything is written. With ``sync=True``
+        the data is fsynced before the descriptor is closed. ``mode`` (masked by
+        the umask) applies when the file is created.
+        """
+        flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0)
+        fd = os.open(file_path, flags, mode)
+        try:
+            view = memoryview(data)
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+            if sync:
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+    
+    @staticmethod
+    def write_atomic(file_path: Union[str, Path], data: str, sync: bool = False) -> Path:
+        """Write text to a file through a temporary sibling and ``os.replace``.
+        
+        A symlinked destination has its target replaced, and that replaced path is
+        returned. With ``sync=True`` the data is fsynced before the rename. Making
+        the rename itself durable is left to ``sync_directories`` so it can be done
+        once per directory rather than once per file.
+        """
+        file_path = Path(file_path)
+        if file_path.is_symlink():
+            # Replace the link target, not the link itself
+            file_path = file_path.resolve()
+        
+        # A unique name keeps concurrent writes to the same output apart
+        tmp_path = file_path.with_name(f"{file_path.name}.{os.urandom(4).hex()}.tmp")
+        
+        # Create the temp file with the destination's permissions so its data is
+        # never more widely readable than the file being replaced
+        try:
+            mode = stat.S_IMODE(os.stat(file_path).st_mode)
+            existed = True
+        except FileNotFoundError:
+            mode = 0o666
+            existed = False
+        
+        try:
+            FileOperations.write_bytes_fast(tmp_path, data.encode('utf-8'), sync=sync, mode=mode)
+            
+            # Restore any permission bits the umask removed at creation
+            if existed:
+                os.chmod(tmp_path, mode)
+            
+            os.replace(tmp_path, file_path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        
+        return file_path
+    
+    @staticmethod
+    def sync_directories(file_paths: Iterable[Union[str, Path]]) -> None:
+        """fsync each distinct parent directory of the given files once."""
+        for directory in {Path(p).parent for p in file_paths}:
+            fd = os.open(directory, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+    
     @staticmethod
     def find_sql_files(directory: Union[str, Path], recursive: bool = True) -> List[Path]:
         """Find all SQL files in a directory."""
@@ -43,10 +182,41 @@ class FileOperations:
         if not directory.exists():
             raise FileNotFoundError(f"Directory not found: {directory}")
         
-        if recursive:
-            return sorted(directory.glob("**/*.sql"))
-        else:
-            return sorted(directory.glob("*.sql"))
+        return sorted(FileOperations.iter_sql_files(directory, recursive=recursive))
+    
+    @staticmethod
+    def iter_sql_files(
+        directory: Union[str, Path], pattern: str = "*.sql", recursive: bool = False
+    ) -> Iterator[Path]:
+        """Lazily yield files whose name matches ``pattern``, walking with ``os.scandir``.
+        
+        Patterns with a directory part (``sub/*.sql``, ``**/*.sql``) cannot be
+        matched against a bare name, so they go through ``Path.glob``/``rglob``.
+        """
+        if '/' in pattern or os.sep in pattern or '**' in pattern:
+            root = Path(directory)
+            paths = root.rglob(pattern) if recursive else root.glob(pattern)
+            yield from (path for path in paths if path.is_file())
+            return
+        
+        match = _name_matcher(pattern)
+        pending = [os.fspath(directory)]
+        
+        while pending:
+            try:
+                entries = os.scandir(pending.pop())
+            except (PermissionError, NotADirectoryError):
+                # Skip unreadable directories, as pathlib's glob does
+                continue
+            
+            with entries:
+                for entry in entries:
+                    # DirEntry caches its type, so these checks rarely need a stat call
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive:
+                            pending.append(entry.path)
+                    elif match(entry.name) and entry.is_file():
+                        yield Path(entry.path)
     
     @staticmethod
     def ensure_parent_dir(file_path: Union[str, Path]) -> None:
@@ -58,7 +228,9 @@ class FileOperations:
     def get_relative_path(file_path: Union[str, Path], base_path: Union[str, Path]) -> Path:
         """Get relative path from base path."""
         file_path = Path(file_path).resolve()
-        base_path = Path(base_path).resolve()
+        base_path = Path(base_path)
+        # Relative bases depend on the cwd, so only absolute ones are cached
+        base_path = _resolved(base_path) if base_path.is_absolute() else base_path.resolve()
         
         try:
             return file_path.relative_to(base_path)
@@ -72,11 +244,8 @@ class FileOperations:
         file_path = Path(file_path)
         
         # Check if in supabase/migrations directory
-        parts = file_path.parts
-        if "supabase" in parts and "migrations" in parts:
+        if _SUPABASE_MIGRATION_DIRS.issubset(file_path.parts):
             return True
         
         # Check filename pattern (timestamp_name.sql)
-        import re
-        pattern = r'^\d{14}_.*\.sql$'
-        return bool(re.match(pattern, file_path.name))
\ No newline at end of file
+        return _SUPABASE_MIGRATION_RE.fullmatch(file_path.name) is not None
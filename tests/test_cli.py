@@ -104,7 +104,7 @@ class TestTransformCommand:
         assert result.exit_code == 1
         assert "File not found" in result.stdout
 
-    @patch("pg_idempotent.cli.SQLTransformer")
+    @patch("pg_idempotent.transformer.transformer.SQLTransformer")
     def test_transform_with_errors(self, mock_transformer, temp_sql_file):
         """Test handling of transformation errors."""
         # Mock transformer to return error
@@ -112,7 +112,7 @@ class TestTransformCommand:
         mock_result = MagicMock()
         mock_result.success = False
         mock_result.errors = ["Test error 1", "Test error 2"]
-        mock_instance.transform_file.return_value = mock_result
+        mock_instance.transform_string.return_value = mock_result
         mock_transformer.return_value = mock_instance
 
         result = runner.invoke(app, ["transform", str(temp_sql_file)])
@@ -121,7 +121,51 @@ class TestTransformCommand:
         assert "Transformation failed" in result.stdout
         assert "Test error 1" in result.stdout
 
-    @patch("pg_idempotent.cli.SQLTransformer")
+    @patch("pg_idempotent.transformer.transformer.SQLTransformer")
+    def test_transform_errors_printed_literally(self, mock_transformer, temp_sql_file):
+        """Test that error text is not interpreted as rich markup."""
+        mock_instance = MagicMock()
+        mock_result = MagicMock()
+        mock_result.success = False
+        mock_result.errors = ['syntax error at or near "[red]"', "unexpected [/bold]"]
+        mock_instance.transform_string.return_value = mock_result
+        mock_transformer.return_value = mock_instance
+
+        result = runner.invoke(app, ["transform", str(temp_sql_file)])
+
+        assert result.exit_code == 1
+        assert '  • syntax error at or near "[red]"' in result.stdout
+        assert "  • unexpected [/bold]" in result.stdout
+
+    def test_transform_unreadable_file(self, temp_sql_file):
+        """Test that a file that cannot be decoded is reported, not raised."""
+        temp_sql_file.write_bytes(b"\xff\xfe\xfa")
+        output_file = temp_sql_file.with_suffix(".out.sql")
+
+        result = runner.invoke(
+            app, ["transform", str(temp_sql_file), "--no-backup", "-o", str(output_file)]
+        )
+
+        assert result.exit_code == 1
+        assert "Transformation failed" in result.stdout
+        assert "File processing failed" in result.stdout
+        assert not output_file.exists()
+
+    @patch("pg_idempotent.transformer.transformer.SQLTransformer")
+    def test_transform_parse_error(self, mock_transformer, temp_sql_file):
+        """Test that parser failures are reported as transformation failures."""
+        mock_instance = MagicMock()
+        mock_instance.parser.parse_sql.side_effect = ValueError("unexpected token")
+        mock_transformer.return_value = mock_instance
+
+        result = runner.invoke(app, ["transform", str(temp_sql_file)])
+
+        assert result.exit_code == 1
+        assert "Transformation failed: unexpected token" in result.stdout
+        assert "File processing failed" not in result.stdout
+        mock_instance.transform_string.assert_not_called()
+
+    @patch("pg_idempotent.transformer.transformer.SQLTransformer")
     def test_transform_with_warnings(self, mock_transformer, temp_sql_file):
         """Test handling of transformation warnings."""
         # Mock transformer to return warnings
@@ -133,7 +177,7 @@ class TestTransformCommand:
         mock_result.warnings = ["Test warning 1"]
         mock_result.errors = []
         mock_result.transformed_sql = "-- Transformed SQL"
-        mock_instance.transform_file.return_value = mock_result
+        mock_instance.transform_string.return_value = mock_result
         mock_instance.validate_transformed_sql.return_value = {"valid": True, "issues": []}
         mock_transformer.return_value = mock_instance
 
@@ -162,6 +206,16 @@ class TestCheckCommand:
         assert result.exit_code == 1
         assert "File not found" in result.stdout
 
+    def test_check_unreadable_file(self, temp_sql_file):
+        """Test that a file that cannot be decoded is reported, not raised."""
+        temp_sql_file.write_bytes(b"\xff\xfe\xfa")
+
+        result = runner.invoke(app, ["check", str(temp_sql_file)])
+
+        assert result.exit_code == 1
+        assert "Analysis failed" in result.stdout
+        assert "File processing failed" in result.stdout
+
     def test_check_shows_statement_types(self, temp_sql_file):
         """Test that check command shows statement types."""
         result = runner.invoke(app, ["check", str(temp_sql_file)])
@@ -170,7 +224,7 @@ class TestCheckCommand:
         assert "CREATE_TABLE" in result.stdout
         assert "CREATE_INDEX" in result.stdout
 
-    @patch("pg_idempotent.cli.SQLTransformer")
+    @patch("pg_idempotent.transformer.transformer.SQLTransformer")
     def test_check_with_many_statements(self, mock_transformer, temp_sql_file):
         """Test check command with more than 10 statements."""
         # Create mock statements
@@ -185,7 +239,7 @@ class TestCheckCommand:
             mock_statements.append(stmt)
 
         mock_instance = MagicMock()
-        mock_instance.get_transformation_stats.return_value = {
+        mock_instance.stats_from.return_value = {
             "total_statements": 15,
             "already_idempotent": 0,
             "transformable": 15,
@@ -202,6 +256,50 @@ class TestCheckCommand:
         assert "and 5 more statements" in result.stdout
 
 
+    @patch("pg_idempotent.transformer.transformer.SQLTransformer")
+    def test_check_statement_statuses(self, mock_transformer, temp_sql_file):
+        """Test status and notes chosen for each kind of statement."""
+        rows = [
+            # (is_idempotent, can_be_wrapped, error)
+            (True, True, "parse failure"),
+            (True, False, None),
+            (True, True, None),
+            (False, True, None),
+        ]
+        mock_statements = []
+        for i, (is_idempotent, can_be_wrapped, error) in enumerate(rows):
+            stmt = MagicMock()
+            stmt.statement_type = f"TYPE_{i}"
+            stmt.object_name = None
+            stmt.is_idempotent = is_idempotent
+            stmt.can_be_wrapped = can_be_wrapped
+            stmt.error = error
+            mock_statements.append(stmt)
+
+        mock_instance = MagicMock()
+        mock_instance.stats_from.return_value = {
+            "total_statements": 4,
+            "already_idempotent": 3,
+            "transformable": 2,
+            "not_transformable": 1,
+            "errors": 1,
+            "by_type": {},
+        }
+        mock_instance.parser.parse_sql.return_value = mock_statements
+        mock_transformer.return_value = mock_instance
+
+        result = runner.invoke(app, ["check", str(temp_sql_file)])
+
+        assert result.exit_code == 0
+        lines = result.stdout.splitlines()
+        row = {i: next(line for line in lines if f"TYPE_{i}" in line) for i in range(4)}
+        assert "Error" in row[0] and "parse failure" in row[0]
+        assert "Cannot Wrap" in row[1]
+        assert "Idempotent" in row[2]
+        assert "Needs Transform" in row[3]
+        assert "N/A" in row[3]
+
+
 class TestPreviewCommand:
     """Test cases for the preview command."""
 
@@ -220,6 +318,22 @@ class TestPreviewCommand:
         assert result.exit_code == 0
         assert "Showing first" in result.stdout
 
+    @patch("pg_idempotent.transformer.transformer.SQLTransformer")
+    def test_preview_remaining_line_count(self, mock_transformer, temp_sql_file):
+        """Test preview reports how many lines were not shown."""
+        mock_instance = MagicMock()
+        mock_result = MagicMock()
+        mock_result.success = True
+        mock_result.transformed_sql = "\n".join(f"SELECT {i};" for i in range(8))
+        mock_instance.transform_sql.return_value = mock_result
+        mock_transformer.return_value = mock_instance
+
+        result = runner.invoke(app, ["preview", str(temp_sql_file), "--lines", "3"])
+
+        assert result.exit_code == 0
+        assert "Showing first 3 lines" in result.stdout
+        assert "and 5 more lines" in result.stdout
+
     def test_preview_nonexistent_file(self):
         """Test preview of non-existent file."""
         result = runner.invoke(app, ["preview", "nonexistent.sql"])
@@ -227,14 +341,14 @@ class TestPreviewCommand:
         assert result.exit_code == 1
         assert "File not found" in result.stdout
 
-    @patch("pg_idempotent.cli.SQLTransformer")
+    @patch("pg_idempotent.transformer.transformer.SQLTransformer")
     def test_preview_transformation_error(self, mock_transformer, temp_sql_file):
         """Test preview when transformation fails."""
         mock_instance = MagicMock()
         mock_result = MagicMock()
         mock_result.success = False
         mock_result.errors = ["Transformation error"]
-        mock_instance.transform_file.return_value = mock_result
+        mock_instance.transform_sql.return_value = mock_result
         mock_transformer.return_value = mock_instance
 
         result = runner.invoke(app, ["preview", str(temp_sql_file)])
@@ -242,6 +356,16 @@ class TestPreviewCommand:
         assert result.exit_code == 1
         assert "Transformation failed" in result.stdout
 
+    def test_preview_unreadable_file(self, temp_sql_file):
+        """Test that a file that cannot be decoded is reported, not raised."""
+        temp_sql_file.write_bytes(b"\xff\xfe\xfa")
+
+        result = runner.invoke(app, ["preview", str(temp_sql_file)])
+
+        assert result.exit_code == 1
+        assert "Transformation failed" in result.stdout
+        assert "File processing failed" in result.stdout
+
 
 class TestBatchCommand:
     """Test cases for the batch command."""
@@ -262,6 +386,16 @@ class TestBatchCommand:
         assert result.exit_code == 0
         assert "Found 3 files to process" in result.stdout
 
+    def test_batch_directory_pattern(self, temp_dir_with_sql_files):
+        """Test batch processing with a pattern that includes a directory part."""
+        result = runner.invoke(
+            app, ["batch", str(temp_dir_with_sql_files), "-r", "-p", "subdir/*.sql"]
+        )
+
+        assert result.exit_code == 0
+        assert "Found 1 files to process" in result.stdout
+        assert "file3.sql" in result.stdout
+
     def test_batch_with_pattern(self, temp_dir_with_sql_files):
         """Test batch processing with file pattern."""
         # Create a non-SQL file
@@ -302,6 +436,102 @@ class TestBatchCommand:
             assert (output_path / "file1.sql").exists()
             assert (output_path / "subdir" / "file3.sql").exists()
 
+    def test_batch_creates_output_dirs_once(self, temp_dir_with_sql_files):
+        """Test that each output directory is created only once."""
+        (temp_dir_with_sql_files / "subdir" / "file4.sql").write_text("CREATE TABLE test4 (id int);")
+
+        with tempfile.TemporaryDirectory() as out_dir:
+            with patch.object(Path, "mkdir", autospec=True, side_effect=Path.mkdir) as mock_mkdir:
+                result = runner.invoke(
+                    app,
+                    ["batch", str(temp_dir_with_sql_files), "--output-dir", out_dir, "--recursive"],
+                )
+
+            assert result.exit_code == 0
+            assert "4 files processed successfully" in result.stdout
+            created = [call.args[0] for call in mock_mkdir.call_args_list]
+            assert created == [Path(out_dir), Path(out_dir) / "subdir"]
+
+    def test_batch_small_pipeline_window(self, temp_dir_with_sql_files):
+        """Test that a bounded read-ahead/write-behind window still processes every file."""
+        with patch("pg_idempotent.cli.PREFETCH_DEPTH", 1):
+            result = runner.invoke(
+                app, ["batch", str(temp_dir_with_sql_files), "--recursive", "--jobs", "1"]
+            )
+
+        assert result.exit_code == 0
+        assert "3 files processed successfully" in result.stdout
+        assert "DO $" in (temp_dir_with_sql_files / "subdir" / "file3.sql").read_text()
+
+    def test_batch_parallel_jobs(self, temp_dir_with_sql_files):
+        """Test batch processing across multiple worker processes."""
+        with tempfile.TemporaryDirectory() as out_dir:
+            result = runner.invoke(
+                app,
+                ["batch", str(temp_dir_with_sql_files), "--output-dir", out_dir, "--jobs", "2"],
+            )
+
+            assert result.exit_code == 0
+            assert "2 files processed successfully" in result.stdout
+
+            output_path = Path(out_dir)
+            assert "CREATE TABLE" in (output_path / "file1.sql").read_text()
+            assert "CREATE TABLE" in (output_path / "file2.sql").read_text()
+
+    def test_batch_defaults_to_all_cores(self, temp_dir_with_sql_files):
+        """Test that batch uses the process pool by default on multi-core machines."""
+        with tempfile.TemporaryDirectory() as out_dir, \
+                patch("pg_idempotent.cli.os.cpu_count", return_value=2), \
+                patch("pg_idempotent.cli._transform_pipelined") as mock_serial:
+            result = runner.invoke(
+                app, ["batch", str(temp_dir_with_sql_files), "--output-dir", out_dir]
+            )
+
+            assert result.exit_code == 0
+            assert "2 files processed successfully" in result.stdout
+            mock_serial.assert_not_called()
+
+    def test_batch_with_sync(self, temp_dir_with_sql_files):
+        """Test batch processing with durable writes."""
+        result = runner.invoke(app, ["batch", str(temp_dir_with_sql_files), "--sync"])
+
+        assert result.exit_code == 0
+        assert "2 files processed successfully" in result.stdout
+        assert "DO $" in (temp_dir_with_sql_files / "file1.sql").read_text()
+        assert not list(temp_dir_with_sql_files.glob("*.tmp"))
+
+    def test_batch_sync_symlinked_output(self, temp_dir_with_sql_files):
+        """Test that --sync fsyncs the directory the symlink target was replaced in."""
+        with tempfile.TemporaryDirectory() as target_dir:
+            target = Path(target_dir).resolve() / "real.sql"
+            target.write_text("CREATE TABLE linked (id int);")
+            link = temp_dir_with_sql_files / "file2.sql"
+            link.unlink()
+            link.symlink_to(target)
+
+            with patch(
+                "pg_idempotent.utils.file_utils.FileOperations.sync_directories"
+            ) as mock_sync:
+                result = runner.invoke(app, ["batch", str(temp_dir_with_sql_files), "--sync"])
+
+            assert result.exit_code == 0
+            assert link.is_symlink()
+            assert "DO $" in target.read_text()
+            synced = list(mock_sync.call_args.args[0])
+            assert target in synced
+            assert link not in synced
+
+    def test_batch_unreadable_file(self, temp_dir_with_sql_files):
+        """Test that a file that cannot be decoded is reported as failed."""
+        (temp_dir_with_sql_files / "bad.sql").write_bytes(b"\xff\xfe\xfa")
+
+        result = runner.invoke(app, ["batch", str(temp_dir_with_sql_files)])
+
+        assert result.exit_code == 0
+        assert "2 files processed successfully" in result.stdout
+        assert "1 files failed" in result.stdout
+        assert "File processing failed" in result.stdout
+
     def test_batch_no_files_found(self):
         """Test batch processing when no files match."""
         with tempfile.TemporaryDirectory() as temp_dir:
@@ -317,7 +547,14 @@ class TestBatchCommand:
         assert result.exit_code == 1
         assert "Directory not found" in result.stdout
 
-    @patch("pg_idempotent.cli.SQLTransformer")
+    def test_batch_file_argument(self, temp_sql_file):
+        """Test batch processing when given a file instead of a directory."""
+        result = runner.invoke(app, ["batch", str(temp_sql_file)])
+
+        assert result.exit_code == 1
+        assert "Not a directory" in result.stdout
+
+    @patch("pg_idempotent.transformer.transformer.SQLTransformer")
     def test_batch_with_errors(self, mock_transformer, temp_dir_with_sql_files):
         """Test batch processing with transformation errors."""
         # Mock transformer to fail on first file, succeed on second
@@ -331,11 +568,13 @@ class TestBatchCommand:
         success_result.success = True
         success_result.statement_count = 1
         success_result.transformed_count = 1
+        success_result.transformed_sql = "-- Transformed SQL"
 
-        mock_instance.transform_file.side_effect = [fail_result, success_result]
+        mock_instance.transform_sql.side_effect = [fail_result, success_result]
         mock_transformer.return_value = mock_instance
 
-        result = runner.invoke(app, ["batch", str(temp_dir_with_sql_files)])
+        # The mocked transformer only exists in this process
+        result = runner.invoke(app, ["batch", str(temp_dir_with_sql_files), "--jobs", "1"])
 
         assert result.exit_code == 0
         assert "1 files processed successfully" in result.stdout
@@ -1,5 +1,6 @@
 """Comprehensive tests for file utilities."""
 
+import os
 import tempfile
 import shutil
 from pathlib import Path
@@ -59,6 +60,21 @@ class TestFileOperations:
         # Cleanup
         original_path.unlink(missing_ok=True)
     
+    def test_backup_file_fast(self):
+        """Test content-only backup copy."""
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.sql', delete=False) as f:
+            f.write("CREATE TABLE test (id int);")
+            original_path = Path(f.name)
+        
+        with tempfile.TemporaryDirectory() as backup_dir:
+            backup_path = FileOperations.backup_file(original_path, backup_dir, fast=True)
+            
+            assert backup_path.exists()
+            assert backup_path.read_text() == original_path.read_text()
+        
+        # Cleanup
+        original_path.unlink(missing_ok=True)
+    
     def test_backup_file_timestamp(self):
         """Test that backup files have timestamp in name."""
         with tempfile.NamedTemporaryFile(mode='w', suffix='.sql', delete=False) as f:
@@ -69,12 +85,12 @@ class TestFileOperations:
             # Create backup
             backup_path = FileOperations.backup_file(original_path)
             
-            # Check timestamp format in filename
-            timestamp_part = backup_path.stem.split('_')[-2:]
-            timestamp_str = '_'.join(timestamp_part)
+            # Check nanosecond timestamp in filename
+            timestamp = int(backup_path.stem.rsplit('_', 1)[-1])
             
-            # Try to parse timestamp
-            datetime.strptime(timestamp_str, "%Y%m%d_%H%M%S")
+            # Should be close to now
+            backup_time = datetime.fromtimestamp(timestamp / 1_000_000_000)
+            assert abs((datetime.now() - backup_time).total_seconds()) < 60
             
         finally:
             # Cleanup
@@ -93,6 +109,112 @@ class TestFileOperations:
         
         assert "File not found" in str(exc_info.value)
     
+    def test_read_sql_basic(self):
+        """Test reading SQL file content."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = Path(temp_dir) / "file.sql"
+            file_path.write_bytes("CREATE TABLE café (id int);\r\nSELECT 1;\n".encode("utf-8"))
+            
+            content = FileOperations.read_sql(file_path)
+            
+            # Newlines are normalized like text-mode reads
+            assert content == "CREATE TABLE café (id int);\nSELECT 1;\n"
+    
+    def test_read_sql_large_file(self):
+        """Test reading a file above the mmap threshold."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = Path(temp_dir) / "large.sql"
+            file_path.write_text("SELECT 1;\n" * 10)
+            
+            with patch("pg_idempotent.utils.file_utils.MMAP_THRESHOLD", 16):
+                content = FileOperations.read_sql(file_path)
+            
+            assert content == "SELECT 1;\n" * 10
+    
+    def test_write_bytes_fast_short_writes(self):
+        """Test that short writes are retried until all bytes are written."""
+        data = "SELECT 'café';\n".encode("utf-8") * 100
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = Path(temp_dir) / "out.sql"
+            file_path.write_text("previous, longer content" * 100)
+            
+            real_write = os.write
+            with patch("os.write", side_effect=lambda fd, buf: real_write(fd, buf[:7])):
+                FileOperations.write_bytes_fast(file_path, data)
+            
+            assert file_path.read_bytes() == data
+    
+    def test_write_atomic_basic(self):
+        """Test atomic write replaces content and leaves no temp file."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = Path(temp_dir) / "out.sql"
+            file_path.write_text("old")
+            file_path.chmod(0o600)
+            
+            FileOperations.write_atomic(file_path, "SELECT 1;", sync=True)
+            FileOperations.sync_directories([file_path])
+            
+            assert file_path.read_text() == "SELECT 1;"
+            assert file_path.stat().st_mode & 0o777 == 0o600
+            assert not list(Path(temp_dir).glob("*.tmp"))
+    
+    def test_write_atomic_through_symlink(self):
+        """Test that writing through a symlink updates the target and keeps the link."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            target = Path(temp_dir) / "target.sql"
+            target.write_text("old")
+            link = Path(temp_dir) / "link.sql"
+            link.symlink_to(target)
+            
+            written = FileOperations.write_atomic(link, "SELECT 1;")
+            
+            assert written == target.resolve()
+            assert link.is_symlink()
+            assert target.read_text() == "SELECT 1;"
+            assert not list(Path(temp_dir).glob("*.tmp"))
+    
+    def test_write_atomic_creates_temp_with_destination_mode(self):
+        """Test that the temp file is never more permissive than the destination."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = Path(temp_dir) / "out.sql"
+            file_path.write_text("old")
+            file_path.chmod(0o600)
+            
+            with patch.object(
+                FileOperations, "write_bytes_fast", wraps=FileOperations.write_bytes_fast
+            ) as mock_write:
+                FileOperations.write_atomic(file_path, "SELECT 1;")
+            
+            assert mock_write.call_args.kwargs["mode"] == 0o600
+            assert file_path.stat().st_mode & 0o777 == 0o600
+    
+    def test_write_atomic_concurrent_same_path(self):
+        """Test that concurrent writes to one path do not share a temp file."""
+        from concurrent.futures import ThreadPoolExecutor
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = Path(temp_dir) / "out.sql"
+            contents = [f"SELECT {i};" for i in range(16)]
+            
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                list(pool.map(lambda data: FileOperations.write_atomic(file_path, data), contents))
+            
+            assert file_path.read_text() in contents
+            assert not list(Path(temp_dir).glob("*.tmp"))
+    
+    def test_write_atomic_cleans_up_on_error(self):
+        """Test that a failed atomic write removes its temp file."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = Path(temp_dir) / "out.sql"
+            
+            with patch("os.replace", side_effect=OSError("rename failed")):
+                with pytest.raises(OSError):
+                    FileOperations.write_atomic(file_path, "SELECT 1;")
+            
+            assert not file_path.exists()
+            assert not list(Path(temp_dir).glob("*.tmp"))
+    
     def test_find_sql_files_basic(self):
         """Test finding SQL files in a directory."""
         with tempfile.TemporaryDirectory() as temp_dir:
@@ -133,6 +255,90 @@ class TestFileOperations:
             file_names = [f.name for f in sql_files]
             assert file_names == sorted(file_names)
     
+    def test_iter_sql_files_pattern(self):
+        """Test lazily iterating files matching a pattern."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_path = Path(temp_dir)
+            
+            (temp_path / "001_init.sql").write_text("SELECT 1;")
+            (temp_path / "002_users.sql").write_text("SELECT 2;")
+            (temp_path / "notes.txt").write_text("Not SQL")
+            subdir = temp_path / "subdir"
+            subdir.mkdir()
+            (subdir / "003_posts.sql").write_text("SELECT 3;")
+            
+            flat = FileOperations.iter_sql_files(temp_path, "00*.sql")
+            nested = FileOperations.iter_sql_files(temp_path, "00*.sql", recursive=True)
+            
+            assert sorted(p.name for p in flat) == ["001_init.sql", "002_users.sql"]
+            assert sorted(nested) == [
+                temp_path / "001_init.sql",
+                temp_path / "002_users.sql",
+                subdir / "003_posts.sql",
+            ]
+    
+    def test_iter_sql_files_suffix_and_glob_patterns(self):
+        """Test that suffix-only and general glob patterns match the same way."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_path = Path(temp_dir)
+            
+            for name in ["a.sql", "b.sql.tmp", "c.SQL", "d.sql.backup", "e.sqlx", ".hidden.sql"]:
+                (temp_path / name).write_text("SELECT 1;")
+            (temp_path / "dir.sql").mkdir()
+            
+            suffix_names = sorted(p.name for p in FileOperations.iter_sql_files(temp_path, "*.sql"))
+            glob_names = sorted(p.name for p in FileOperations.iter_sql_files(temp_path, "*.s[q]l"))
+            
+            assert suffix_names == [".hidden.sql", "a.sql"]
+            assert glob_names == suffix_names
+    
+    def test_iter_sql_files_directory_patterns(self):
+        """Test patterns that include a directory part."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_path = Path(temp_dir)
+            
+            (temp_path / "top.sql").write_text("SELECT 1;")
+            subdir = temp_path / "sub"
+            subdir.mkdir()
+            (subdir / "a.sql").write_text("SELECT 2;")
+            (subdir / "notes.txt").write_text("Not SQL")
+            nested = subdir / "deeper"
+            nested.mkdir()
+            (nested / "b.sql").write_text("SELECT 3;")
+            
+            flat = sorted(FileOperations.iter_sql_files(temp_path, "sub/*.sql"))
+            everywhere = sorted(FileOperations.iter_sql_files(temp_path, "**/*.sql", recursive=True))
+            
+            assert flat == [subdir / "a.sql"]
+            assert everywhere == sorted([temp_path / "top.sql", subdir / "a.sql", nested / "b.sql"])
+    
+    def test_iter_sql_files_skips_unreadable_directories(self):
+        """Test that subdirectories that cannot be listed are skipped."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_path = Path(temp_dir)
+            
+            (temp_path / "top.sql").write_text("SELECT 1;")
+            locked = temp_path / "locked"
+            locked.mkdir()
+            (locked / "hidden.sql").write_text("SELECT 2;")
+            
+            real_scandir = os.scandir
+            
+            def scandir(path):
+                if Path(path) == locked:
+                    raise PermissionError(13, "Permission denied", str(path))
+                return real_scandir(path)
+            
+            with patch("pg_idempotent.utils.file_utils.os.scandir", side_effect=scandir):
+                found = FileOperations.find_sql_files(temp_path, recursive=True)
+            
+            assert found == [temp_path / "top.sql"]
+    
+    def test_iter_sql_files_not_a_directory(self):
+        """Test that iterating a file instead of a directory yields nothing."""
+        with tempfile.NamedTemporaryFile(suffix='.sql') as f:
+            assert list(FileOperations.iter_sql_files(f.name)) == []
+    
     def test_find_sql_files_nonexistent_directory(self):
         """Test finding SQL files in non-existent directory."""
         non_existent = Path("/tmp/nonexistent_directory")
@@ -191,6 +397,19 @@ class TestFileOperations:
         # Should return original path when not a subpath
         assert relative == file_path.resolve()
     
+    def test_get_relative_path_relative_base_follows_cwd(self, monkeypatch):
+        """Test that a relative base is resolved against the current directory."""
+        with tempfile.TemporaryDirectory() as first, tempfile.TemporaryDirectory() as second:
+            first_path = Path(first).resolve()
+            second_path = Path(second).resolve()
+            
+            monkeypatch.chdir(first_path)
+            assert FileOperations.get_relative_path(first_path / "a.sql", ".") == Path("a.sql")
+            
+            monkeypatch.chdir(second_path)
+            assert FileOperations.get_relative_path(second_path / "b.sql", ".") == Path("b.sql")
+            assert FileOperations.get_relative_path(first_path / "a.sql", ".") == first_path / "a.sql"
+    
     def test_get_relative_path_with_symlinks(self):
         """Test getting relative path with symbolic links."""
         with tempfile.TemporaryDirectory() as temp_dir:
@@ -342,13 +561,10 @@ class TestFileOperations:
         
         backup_paths = []
         try:
-            # Create multiple backups
+            # Create multiple backups in quick succession
             for i in range(3):
                 backup_path = FileOperations.backup_file(original_path)
                 backup_paths.append(backup_path)
-                # Delay 1 second to ensure different timestamps (timestamp format is YYYYMMDD_HHMMSS)
-                import time
-                time.sleep(1.1)
             
             # Verify all backups exist and have unique names
             assert len(set(backup_paths)) == 3
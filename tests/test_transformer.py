@@ -1,4 +1,7 @@
 """Tests for the SQL transformer."""
+import tempfile
+from pathlib import Path
+
 import pytest
 from pg_idempotent.transformer.transformer import SQLTransformer
 
@@ -147,6 +150,62 @@ CREATE TABLE test (
         assert "This is a comment" in result.transformed_sql
         assert "inline comment" in result.transformed_sql
 
+    def test_transform_parsed_matches_transform_sql(self):
+        """Test that pre-parsed statements transform the same as raw SQL."""
+        sql = """
+CREATE TABLE users (id SERIAL PRIMARY KEY);
+CREATE INDEX IF NOT EXISTS idx_users ON users(id);
+"""
+        statements = self.transformer.parser.parse_sql(sql)
+
+        parsed_result = self.transformer.transform_parsed(statements, sql)
+        sql_result = self.transformer.transform_sql(sql)
+
+        assert parsed_result.success
+        assert parsed_result.transformed_sql == sql_result.transformed_sql
+        assert parsed_result.statement_count == sql_result.statement_count
+        assert parsed_result.transformed_count == sql_result.transformed_count
+
+    def test_stats_from_parsed_statements(self):
+        """Test stats computed from pre-parsed statements."""
+        sql = """
+CREATE TABLE users (id SERIAL PRIMARY KEY);
+CREATE INDEX IF NOT EXISTS idx_users ON users(id);
+"""
+        statements = self.transformer.parser.parse_sql(sql)
+
+        stats = self.transformer.stats_from(statements)
+
+        assert stats == self.transformer.get_transformation_stats(sql)
+        assert stats['total_statements'] == 2
+        assert list(stats['by_type']) == ['CREATE_INDEX', 'CREATE_TABLE']
+
+    def test_transform_string_writes_output(self):
+        """Test transforming in-memory SQL into an output file."""
+        sql = "CREATE TABLE users (id SERIAL PRIMARY KEY);"
+        statements = self.transformer.parser.parse_sql(sql)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output_path = Path(temp_dir) / "out.sql"
+
+            result = self.transformer.transform_string(sql, output_path, statements)
+
+            assert result.success
+            assert result.statement_count == 1
+            assert output_path.read_text(encoding='utf-8') == result.transformed_sql
+
+    def test_transform_string_write_failure(self):
+        """Test that output write errors are reported in the result."""
+        sql = "CREATE TABLE users (id SERIAL PRIMARY KEY);"
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output_path = Path(temp_dir) / "missing" / "out.sql"
+
+            result = self.transformer.transform_string(sql, output_path)
+
+            assert not result.success
+            assert "File processing failed" in result.errors[0]
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
\ No newline at end of file